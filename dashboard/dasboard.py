@@ -1,161 +1,213 @@
 import streamlit as st
-import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
-# Load data
-@st.cache_data
-def load_data():
-    co_data = pd.read_csv('dashboard/PRSA_Data_Tiantan_20130301-20170228.csv')
-    temp_data = pd.read_csv('dashboard/PRSA_Data_Shunyi_20130301-20170228.csv')
-    print("Columns in CO dataset:", co_data.columns.tolist())
-    print("Columns in Temperature dataset:", temp_data.columns.tolist())
-    
-    # Process CO data
-    if all(col in co_data.columns for col in ['year', 'month', 'day', 'hour']):
-        co_data['datetime'] = pd.to_datetime(co_data[['year', 'month', 'day', 'hour']])
-    else:
-        st.error("Required columns (year, month, day, hour) are not present in the CO dataset.")
-        st.stop()
-    
-    # Process temperature data
-    # Create a datetime from year, month, day, and hour if those columns are present
-    if all(col in temp_data.columns for col in ['year', 'month', 'day', 'hour']):
-        temp_data['datetime'] = pd.to_datetime(temp_data[['year', 'month', 'day', 'hour']])
-    else:
-        st.error("Required columns (year, month, day, hour) are not present in the temperature dataset.")
-        st.stop()
-    
-    return co_data, temp_data
+from data_loader import load_daily_means, load_shunyi, load_tiantan
+from plot_style import HOUR_AXIS, TITLE_FONTS
+
+# Upper bound on the points sent to the browser per trend trace
+TREND_MAX_POINTS = 2000
+
+# Reduce a series to at most n_out points by keeping the minimum and maximum of
+# each bucket, so peaks survive while the browser only draws what fits on screen
+def downsample_minmax(x, y, n_out=TREND_MAX_POINTS):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    if len(y) <= n_out:
+        return x, y
+
+    edges = np.linspace(0, len(y), n_out // 2 + 1).astype(np.int64)
+    keep = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        bucket = y[start:end]
+        if np.isnan(bucket).all():
+            keep.append(start)
+            continue
+        keep.append(start + np.nanargmin(bucket))
+        keep.append(start + np.nanargmax(bucket))
+    keep = np.unique(keep)
+    return x[keep], y[keep]
+
+HOURS = np.arange(24)
+
+# Count distinct values per hour of day from factorized codes (-1 = missing)
+# by marking each (hour, code) pair in a small boolean table
+def nunique_by_hour(hour, codes):
+    valid = codes >= 0
+    hour, codes = hour[valid], codes[valid]
+    n_codes = int(codes.max()) + 1 if len(codes) else 0
+    seen = np.zeros((len(HOURS), n_codes), dtype=bool)
+    seen[hour, codes] = True
+    return seen.sum(axis=1)
+
+# Mean of the non-missing values per hour of day
+def mean_by_hour(hour, values):
+    valid = ~np.isnan(values)
+    counts = np.bincount(hour[valid], minlength=len(HOURS))
+    sums = np.bincount(hour[valid], weights=values[valid], minlength=len(HOURS))
+    with np.errstate(invalid='ignore'):
+        return sums / counts
+
+# Rows from day lo through day hi inclusive, as the half-open datetime64 range
+# [lo, hi + 1 day) located by binary search on the sorted index
+def select_range(data, lo, hi):
+    start, end = data.index.searchsorted(
+        [np.datetime64(lo, 'D'), np.datetime64(hi, 'D') + np.timedelta64(1, 'D')]
+    )
+    return data.iloc[start:end]
+
+# The figures only depend on the selected range, so reruns triggered by other
+# widgets reuse the cached figures instead of rebuilding them. Only the most
+# recent ranges are kept, since every date pair would otherwise stay cached
+# for the life of the process
+RANGE_CACHE_ENTRIES = 32
+
+@st.cache_data(show_spinner=False, max_entries=RANGE_CACHE_ENTRIES)
+def build_hour_figs(lo, hi):
+    filtered_co_data = select_range(load_tiantan(), lo, hi)
+    filtered_temp_data = select_range(load_shunyi(), lo, hi)
+
+    # Calculate CO counts by hour
+    co_counts_by_hour = nunique_by_hour(filtered_co_data['hour'].to_numpy(), filtered_co_data['CO_code'].to_numpy())
+
+    # Create bar plot for CO using Plotly
+    fig_co = px.bar(x=HOURS, y=co_counts_by_hour,
+                     title='Jumlah CO Berdasarkan Jam',
+                     labels={'x': 'Jam', 'y': 'Jumlah CO'},
+                     template='plotly_white')
+
+    fig_co.update_layout(**TITLE_FONTS, **HOUR_AXIS)
+
+    # Calculate average temperature by hour
+    avg_temp_by_hour = mean_by_hour(filtered_temp_data['hour'].to_numpy(), filtered_temp_data['TEMP'].to_numpy())
+
+    # Create bar plot for temperature using Plotly
+    fig_temp = px.bar(x=HOURS, y=avg_temp_by_hour,
+                      title='Rata-rata Suhu (TEMP) Berdasarkan Jam',
+                      labels={'x': 'Jam', 'y': 'Rata-rata Suhu (°C)', 'color': 'Rata-rata Suhu (°C)'},
+                      template='plotly_white',
+                      color=avg_temp_by_hour,
+                      color_continuous_scale='RdBu_r')  # Red-Blue diverging color scale
+
+    fig_temp.update_layout(**TITLE_FONTS, **HOUR_AXIS)
+
+    return fig_co, fig_temp
+
+@st.cache_data(show_spinner=False, max_entries=RANGE_CACHE_ENTRIES)
+def build_trend_fig(lo, hi):
+    # Slice the precomputed daily means rather than regrouping the hourly rows
+    co_daily, temp_daily = load_daily_means()
+    daily_co_data = select_range(co_daily, lo, hi)
+    daily_temp_data = select_range(temp_daily, lo, hi)
+
+    co_x, co_y = downsample_minmax(daily_co_data.index.values.astype('datetime64[D]'), daily_co_data.values)
+    temp_x, temp_y = downsample_minmax(daily_temp_data.index.values.astype('datetime64[D]'), daily_temp_data.values)
+
+    fig_trend = go.Figure()
+
+    fig_trend.add_trace(go.Scattergl(
+        x=co_x,
+        y=co_y,
+        name='CO',
+        yaxis='y1'
+    ))
+
+    fig_trend.add_trace(go.Scattergl(
+        x=temp_x,
+        y=temp_y,
+        name='Temperature',
+        yaxis='y2'
+    ))
+
+    fig_trend.update_layout(
+        title='Tren Rata-rata CO dan Suhu Harian',
+        xaxis=dict(title='Tanggal'),
+        yaxis=dict(title='CO', side='left'),
+        yaxis2=dict(title='Suhu (°C)', side='right', overlaying='y'),
+        legend=dict(x=0.01, y=0.99, bgcolor='rgba(255, 255, 255, 0.8)'),
+        **TITLE_FONTS,
+        yaxis2_title_font_size=16
+    )
+
+    return fig_trend
+
+# Summary statistics for the selected range; only the two small result series
+# leave the cache, never the filtered frames
+@st.cache_data(show_spinner=False, max_entries=RANGE_CACHE_ENTRIES)
+def build_stats(lo, hi):
+    co_stats = select_range(load_tiantan(), lo, hi)['CO'].agg(['mean', 'max', 'min'])
+    temp_stats = select_range(load_shunyi(), lo, hi)['TEMP'].agg(['mean', 'max', 'min'])
+    return co_stats, temp_stats
 
 # Main function to run the Streamlit app
 def main():
     st.title('Dashboard Kualitas Udara: Analisis CO dan Suhu')
 
-    # Load data
-    co_data, temp_data = load_data()
+    # Load data (the figure builders below reuse the cached frames)
+    co_data = load_tiantan()
 
     # Sidebar
     st.sidebar.header('Pengaturan')
     
-    # Date range selector
+    # Date range selector (the index is sorted, so its ends are the bounds)
+    first_day, last_day = co_data.index[0].date(), co_data.index[-1].date()
     date_range = st.sidebar.date_input(
         "Pilih rentang tanggal",
-        [co_data['datetime'].min().date(), co_data['datetime'].max().date()],
-        min_value=co_data['datetime'].min().date(),
-        max_value=co_data['datetime'].max().date()
+        [first_day, last_day],
+        min_value=first_day,
+        max_value=last_day
     )
 
     # Filter data based on date range
-    filtered_co_data = co_data[(co_data['datetime'].dt.date >= date_range[0]) & 
-                                (co_data['datetime'].dt.date <= date_range[1])]
-    filtered_temp_data = temp_data[(temp_data['datetime'].dt.date >= date_range[0]) & 
-                                    (temp_data['datetime'].dt.date <= date_range[1])]
+    # The builders select the rows with select_range(); the ISO day strings
+    # double as their cache keys
+    lo, hi = date_range[0].isoformat(), date_range[1].isoformat()
+
+    fig_co, fig_temp = build_hour_figs(lo, hi)
 
     # CO Analysis
     st.header('Analisis CO')
 
-    # Calculate CO counts by hour
-    co_counts_by_hour = filtered_co_data.groupby('hour')['CO'].nunique().reset_index()
-
-    # Create bar plot for CO using Plotly
-    fig_co = px.bar(co_counts_by_hour, x='hour', y='CO', 
-                     title='Jumlah CO Berdasarkan Jam',
-                     labels={'hour': 'Jam', 'CO': 'Jumlah CO'},
-                     template='plotly_white')
-    
-    fig_co.update_layout(
-        title_font_size=20,
-        xaxis_title_font_size=16,
-        yaxis_title_font_size=16,
-        xaxis=dict(tickmode='linear', tick0=0, dtick=1)
-    )
-
     # Display the CO plot
     st.plotly_chart(fig_co, use_container_width=True)
 
     # Temperature Analysis
     st.header('Analisis Suhu')
 
-    # Calculate average temperature by hour
-    avg_temp_by_hour = filtered_temp_data.groupby('hour')['TEMP'].mean().reset_index()
-
-    # Create bar plot for temperature using Plotly
-    fig_temp = px.bar(avg_temp_by_hour, x='hour', y='TEMP',
-                      title='Rata-rata Suhu (TEMP) Berdasarkan Jam',
-                      labels={'hour': 'Jam', 'TEMP': 'Rata-rata Suhu (°C)'},
-                      template='plotly_white',
-                      color='TEMP',
-                      color_continuous_scale='RdBu_r')  # Red-Blue diverging color scale
-
-    fig_temp.update_layout(
-        title_font_size=20,
-        xaxis_title_font_size=16,
-        yaxis_title_font_size=16,
-        xaxis=dict(tickmode='linear', tick0=0, dtick=1)
-    )
-
     # Display the temperature plot
     st.plotly_chart(fig_temp, use_container_width=True)
 
     # Additional statistics
     st.header('Statistik Tambahan')
+    co_stats, temp_stats = build_stats(lo, hi)
+
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Rata-rata CO", f"{filtered_co_data['CO'].mean():.2f}")
+        st.metric("Rata-rata CO", f"{co_stats['mean']:.2f}")
     
     with col2:
-        st.metric("CO Maksimum", filtered_co_data['CO'].max())
+        st.metric("CO Maksimum", co_stats['max'])
     
     with col3:
-        st.metric("CO Minimum", filtered_co_data['CO'].min())
+        st.metric("CO Minimum", co_stats['min'])
 
     col4, col5, col6 = st.columns(3)
 
     with col4:
-        st.metric("Rata-rata Suhu", f"{filtered_temp_data['TEMP'].mean():.2f} °C")
+        st.metric("Rata-rata Suhu", f"{temp_stats['mean']:.2f} °C")
     
     with col5:
-        st.metric("Suhu Maksimum", f"{filtered_temp_data['TEMP'].max():.2f} °C")
+        st.metric("Suhu Maksimum", f"{temp_stats['max']:.2f} °C")
     
     with col6:
-        st.metric("Suhu Minimum", f"{filtered_temp_data['TEMP'].min():.2f} °C")
+        st.metric("Suhu Minimum", f"{temp_stats['min']:.2f} °C")
 
     # Time series plots
     st.header('Tren CO dan Suhu Sepanjang Waktu')
-    
-    daily_co_data = filtered_co_data.groupby(filtered_co_data['datetime'].dt.date)['CO'].mean().reset_index()
-    daily_temp_data = filtered_temp_data.groupby(filtered_temp_data['datetime'].dt.date)['TEMP'].mean().reset_index()
-    
-    fig_trend = go.Figure()
 
-    fig_trend.add_trace(go.Scatter(
-        x=daily_co_data['datetime'],
-        y=daily_co_data['CO'],
-        name='CO',
-        yaxis='y1'
-    ))
-
-    fig_trend.add_trace(go.Scatter(
-        x=daily_temp_data['datetime'],
-        y=daily_temp_data['TEMP'],
-        name='Temperature',
-        yaxis='y2'
-    ))
-
-    fig_trend.update_layout(
-        title='Tren Rata-rata CO dan Suhu Harian',
-        xaxis=dict(title='Tanggal'),
-        yaxis=dict(title='CO', side='left'),
-        yaxis2=dict(title='Suhu (°C)', side='right', overlaying='y'),
-        legend=dict(x=0.01, y=0.99, bgcolor='rgba(255, 255, 255, 0.8)'),
-        title_font_size=20,
-        xaxis_title_font_size=16,
-        yaxis_title_font_size=16,
-        yaxis2_title_font_size=16
-    )
-    
+    fig_trend = build_trend_fig(lo, hi)
     st.plotly_chart(fig_trend, use_container_width=True)
 
 if __name__ == '__main__':
@@ -0,0 +1,109 @@
+import contextlib
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+import numpy as np
+import pandas as pd
+
+# The only columns the dashboard works with, with narrow dtypes that halve the
+# bytes every filter and aggregation has to move
+COLUMN_DTYPES = {
+    'year': 'int16',
+    'month': 'int8',
+    'day': 'int8',
+    'hour': 'int8',
+    'CO': 'float32',
+    'TEMP': 'float32',
+}
+
+# Bump whenever load_station() changes what it stores; together with
+# COLUMN_DTYPES it names the Parquet copy, so copies written by other versions
+# are never read back
+CACHE_VERSION = 1
+
+def cache_path(path):
+    schema = repr((CACHE_VERSION, sorted(COLUMN_DTYPES.items())))
+    key = hashlib.sha1(schema.encode()).hexdigest()[:8]
+    return f"{os.path.splitext(path)[0]}.{key}.parquet"
+
+TIANTAN_CSV = 'dashboard/PRSA_Data_Tiantan_20130301-20170228.csv'
+SHUNYI_CSV = 'dashboard/PRSA_Data_Shunyi_20130301-20170228.csv'
+
+# Read a station from its Parquet copy when that is newer than the CSV, else
+# from the CSV. Makes no Streamlit calls, so it is safe to run on a worker
+# thread; returns the frame and whether it came from the Parquet copy.
+def read_station(path):
+    parquet_path = cache_path(path)
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(path):
+        return pd.read_parquet(parquet_path), True
+
+    # A callable usecols skips the other columns without failing on missing ones,
+    # so load_station() can still report them
+    return pd.read_csv(path, usecols=lambda col: col in COLUMN_DTYPES, dtype=COLUMN_DTYPES), False
+
+# Turn a freshly parsed station CSV into the indexed frame the dashboard uses
+# and store its Parquet copy
+def load_station(data, path, label):
+    print(f"Columns in {label} dataset: {data.columns.tolist()}")
+
+    # Create a datetime from year, month, day, and hour if those columns are present
+    if all(col in data.columns for col in ['year', 'month', 'day', 'hour']):
+        # Assemble the timestamps with numpy date arithmetic instead of
+        # pd.to_datetime's per-row assembly of a year/month/day/hour frame
+        data['datetime'] = (
+            (data['year'].to_numpy() - 1970).astype('datetime64[Y]')
+            + (data['month'].to_numpy() - 1).astype('timedelta64[M]')
+            + (data['day'].to_numpy() - 1).astype('timedelta64[D]')
+            + data['hour'].to_numpy().astype('timedelta64[h]')
+        ).astype('datetime64[ns]')
+        data = data.sort_values('datetime').set_index('datetime')
+        data['CO_code'] = pd.factorize(data['CO'])[0].astype(np.int32)
+    else:
+        st.error(f"Required columns (year, month, day, hour) are not present in the {label} dataset.")
+        st.stop()
+
+    # Write to a temporary file first so a partial write never looks fresh
+    parquet_path = cache_path(path)
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    try:
+        data.to_parquet(tmp_path, compression='zstd')
+        os.replace(tmp_path, parquet_path)
+    except OSError:
+        # Read-only deployments just fall back to parsing the CSV each time
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+
+    return data
+
+# Both stations behind one cache entry shared by every page importing this
+# module. The two reads run concurrently (the CSV and Parquet readers release
+# the GIL), so a cold start costs roughly one parse instead of two; everything
+# touching Streamlit stays on the script thread. cache_resource hands every
+# caller the same frames instead of a fresh unpickled copy; callers only ever
+# read from them.
+@st.cache_resource
+def load_stations():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        co_read, temp_read = executor.map(read_station, [TIANTAN_CSV, SHUNYI_CSV])
+    (co_data, co_cached), (temp_data, temp_cached) = co_read, temp_read
+
+    if not co_cached:
+        co_data = load_station(co_data, TIANTAN_CSV, 'CO')
+    if not temp_cached:
+        temp_data = load_station(temp_data, SHUNYI_CSV, 'temperature')
+    return co_data, temp_data
+
+def load_tiantan():
+    return load_stations()[0]
+
+def load_shunyi():
+    return load_stations()[1]
+
+# Daily means over the whole record, computed once so the trend chart only has
+# to slice them
+@st.cache_resource
+def load_daily_means():
+    co_daily = load_tiantan()['CO'].resample('1D').mean()
+    temp_daily = load_shunyi()['TEMP'].resample('1D').mean()
+    return co_daily, temp_daily
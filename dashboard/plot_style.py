@@ -0,0 +1,16 @@
+# Layout styling shared by the dashboard figures. It lives in an imported
+# module so it is built once per process rather than on every script rerun,
+# and is applied to each figure's own layout, which Streamlit's theme leaves
+# alone (unlike layout.template).
+
+# Title and axis-title font sizes used by every figure
+TITLE_FONTS = dict(
+    title_font_size=20,
+    xaxis_title_font_size=16,
+    yaxis_title_font_size=16,
+)
+
+# One tick per hour on the 0-23 hour-of-day axis
+HOUR_AXIS = dict(
+    xaxis=dict(tickmode='linear', tick0=0, dtick=1),
+)